@@ -54,6 +54,43 @@ except ImportError:
         except Exception:
             return 0.0
 
+def _clip(x: float, lo: float, hi: float) -> float:
+    """Scalar clamp; avoids a 0-d ndarray round-trip per signal."""
+    return lo if x < lo else hi if x > hi else x
+
+def _nbytes(val) -> int:
+    """Array bytes held by a cached value (column dicts); parsed JSON stats count as ~0."""
+    if isinstance(val, dict):
+        return sum(getattr(v, "nbytes", 0) for v in val.values())
+    return getattr(val, "nbytes", 0)
+
+def _cached_by_stat(fn, maxsize: int = 32, max_bytes: int = 256 << 20):
+    """Memoize a path loader so unchanged files skip disk + parsing.
+    One entry per path, replaced when its (mtime_ns, size) changes; LRU-bounded by count and bytes."""
+    cache: Dict = {}  # path -> (sig, value, nbytes), least recently used first
+    total = 0
+    def wrap(path: str):
+        nonlocal total
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+        entry = cache.pop(path, None)
+        if entry is not None:
+            total -= entry[2]
+            if entry[0] != sig:
+                entry = None  # file rewritten: drop the stale copy before reloading
+        if entry is None:
+            val = fn(path)
+            entry = (sig, val, _nbytes(val))
+        cache[path] = entry
+        total += entry[2]
+        while len(cache) > maxsize or (total > max_bytes and len(cache) > 1):
+            total -= cache.pop(next(iter(cache)))[2]  # evict least recently used
+        return entry[1]
+    return wrap
+
+_load_reference_stats_cached = _cached_by_stat(load_reference_stats)
+_load_csv_numeric_columns_cached = _cached_by_stat(load_csv_numeric_columns)
+
 @dataclass
 class AMRCConfig:
     alpha: float = 1.0      # drift weight scaler
@@ -63,6 +100,7 @@ class AMRCConfig:
     lr: float = 0.05        # adaptation step
     min_gap_minutes: float = 30.0
     cost_per_min: float = 0.0  # set >0 to convert minutes->currency proxy
+    state_flush_interval: float = 0.0  # >0: coalesce state writes (seconds)
 
 class AMRC:
     """
@@ -74,7 +112,7 @@ class AMRC:
         self.cfg = cfg
         try:
             if StateStore is not None:
-                self.state = StateStore(state_path)
+                self.state = StateStore(state_path, flush_interval=cfg.state_flush_interval)
             else:
                 print("[WARN] StateStore not available, AMRC will use fallback mode")
                 self.state = None
@@ -87,10 +125,7 @@ class AMRC:
             return 0.0
         minutes = (time.time() - last_ts) / 60.0
         f = max(0.0, (self.cfg.min_gap_minutes - minutes)) / self.cfg.min_gap_minutes
-        if np is not None:
-            return float(np.clip(f, 0.0, 1.0))
-        else:
-            return float(max(0.0, min(f, 1.0)))
+        return float(_clip(f, 0.0, 1.0))
 
     def decide(
         self,
@@ -103,28 +138,21 @@ class AMRC:
             
         try:
             st = self.state.get()
-            if np is not None:
-                w = np.array(st["w"], dtype=float)  # [w1,w2,w3,w4]
-            else:
-                w = st["w"]  # use list directly
+            w = [float(v) for v in st["w"]]  # [w1,w2,w3,w4]
             theta = float(st["theta"])
             last_ts = float(st["last_retrain_ts"])
 
             # signals
-            ref_stats = load_reference_stats(ref_stats_path) if os.path.exists(ref_stats_path) else {"columns": {}}
-            new_cols = load_csv_numeric_columns(new_csv_path) if os.path.exists(new_csv_path) else {}
+            ref_stats = _load_reference_stats_cached(ref_stats_path) if os.path.exists(ref_stats_path) else {"columns": {}}
+            new_cols = _load_csv_numeric_columns_cached(new_csv_path) if os.path.exists(new_csv_path) else {}
             s1_raw = drift_wasserstein(ref_stats, new_cols)      # 0..~10
-            
-            if np is not None:
-                s1 = float(np.clip(s1_raw / 5.0, 0.0, 1.0))          # normalize to 0..1
-            else:
-                s1 = float(max(0.0, min(s1_raw / 5.0, 1.0)))
+            s1 = float(_clip(s1_raw / 5.0, 0.0, 1.0))              # normalize to 0..1
 
             s2 = 0.0
             if probs_csv_path and os.path.exists(probs_csv_path):
                 try:
                     if np is not None:
-                        probs = np.genfromtxt(probs_csv_path, delimiter=",")
+                        probs = np.loadtxt(probs_csv_path, delimiter=",", dtype=np.float32)  # C parser, no type inference
                         if probs.ndim == 1:
                             probs = probs.reshape(-1, 2)
                         s2 = entropy_from_probs(probs)                   # 0..1
@@ -134,31 +162,18 @@ class AMRC:
             mb = file_size_mb(new_csv_path)
             cost_min = estimate_cost_minutes(mb)
             s3 = cost_min if self.cfg.cost_per_min <= 0 else cost_min * self.cfg.cost_per_min
-            
-            if np is not None:
-                s3 = float(np.clip(s3 / 30.0, 0.0, 1.0))             # 30 min → 1.0 norm
-            else:
-                s3 = float(max(0.0, min(s3 / 30.0, 1.0)))
+            s3 = float(_clip(s3 / 30.0, 0.0, 1.0))                 # 30 min → 1.0 norm
 
             s4 = self._fatigue(last_ts)                          # 0..1
 
-            if np is not None:
-                signals = np.array([
-                    self.cfg.alpha * s1,
-                    self.cfg.beta  * s2,
-                   -self.cfg.gamma * s3,
-                   -self.cfg.delta * s4
-                ], dtype=float)
-                R = float(np.dot(w, signals))
-            else:
-                signals = [
-                    self.cfg.alpha * s1,
-                    self.cfg.beta  * s2,
-                   -self.cfg.gamma * s3,
-                   -self.cfg.delta * s4
-                ]
-                R = float(sum(w[i] * signals[i] for i in range(len(w))))
-            
+            # 4-term score as plain float math (an ndarray + np.dot costs more than the arithmetic)
+            R = float(
+                w[0] * self.cfg.alpha * s1
+                + w[1] * self.cfg.beta * s2
+                - w[2] * self.cfg.gamma * s3
+                - w[3] * self.cfg.delta * s4
+            )
+
             retrain = R > theta
 
             return {
@@ -191,41 +206,25 @@ class AMRC:
             print("[WARN] Cannot adapt - state store not available")
             return
             
-        try:
-            st = self.state.get()
-            if np is not None:
-                w = np.array(st["w"], dtype=float)
-                err = float(np.clip(outcome_error, 0.0, 1.0))
-                cst = float(np.clip(outcome_cost_minutes / 30.0, 0.0, 1.0))
-                
-                # push sensitivity to error and cost
-                w[0] = float(np.clip(w[0] + self.cfg.lr * err, 0.0, 2.0))  # drift
-                w[1] = float(np.clip(w[1] + self.cfg.lr * err, 0.0, 2.0))  # entropy
-                w[2] = float(np.clip(w[2] + self.cfg.lr * cst, 0.0, 2.0))  # cost
-                w[3] = float(np.clip(w[3] + self.cfg.lr * cst, 0.0, 2.0))  # fatigue
-                
-                w_list = list(map(float, w))
-            else:
-                w = st["w"]
-                err = float(max(0.0, min(outcome_error, 1.0)))
-                cst = float(max(0.0, min(outcome_cost_minutes / 30.0, 1.0)))
-                
-                # push sensitivity to error and cost
-                w[0] = float(max(0.0, min(w[0] + self.cfg.lr * err, 2.0)))  # drift
-                w[1] = float(max(0.0, min(w[1] + self.cfg.lr * err, 2.0)))  # entropy
-                w[2] = float(max(0.0, min(w[2] + self.cfg.lr * cst, 2.0)))  # cost
-                w[3] = float(max(0.0, min(w[3] + self.cfg.lr * cst, 2.0)))  # fatigue
-                
-                w_list = w
-            
-            theta = float(st["theta"])
+        def step(st: Dict) -> Dict:
+            lr = self.cfg.lr
+            err = _clip(float(outcome_error), 0.0, 1.0)
+            cst = _clip(outcome_cost_minutes / 30.0, 0.0, 1.0)
+            w = [float(v) for v in st["w"]]
+
+            # push sensitivity to error and cost
+            w = [
+                _clip(w[0] + lr * err, 0.0, 2.0),  # drift
+                _clip(w[1] + lr * err, 0.0, 2.0),  # entropy
+                _clip(w[2] + lr * cst, 0.0, 2.0),  # cost
+                _clip(w[3] + lr * cst, 0.0, 2.0),  # fatigue
+            ]
             # keep firing rate reasonable by nudging theta against combined pressure
-            if np is not None:
-                theta = float(np.clip(theta + self.cfg.lr * (0.5 - 0.5*err - 0.5*cst), 0.1, 1.5))
-            else:
-                theta = float(max(0.1, min(theta + self.cfg.lr * (0.5 - 0.5*err - 0.5*cst), 1.5)))
+            theta = _clip(float(st["theta"]) + lr * (0.5 - 0.5 * err - 0.5 * cst), 0.1, 1.5)
+            return {"w": w, "theta": theta}
 
-            self.state.update(w=w_list, theta=theta)
+        try:
+            self.state.modify(step)  # single locked read + write
         except Exception as e:
             print(f"[ERROR] AMRC adaptation failed: {e}")
 
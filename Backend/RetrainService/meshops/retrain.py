@@ -20,6 +20,7 @@ import os
 import sys
 import json
 import time
+import uuid
 import shutil
 import subprocess
 from pathlib import Path
@@ -35,7 +36,19 @@ try:
 except Exception:
     yaml = None
 
+try:
+    import aioboto3
+except Exception:
+    aioboto3 = None
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+import asyncio
 import boto3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 
 # ─────────────────── ENV ───────────────────
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
@@ -43,9 +56,13 @@ S3_BUCKET = os.getenv("AWS_S3_BUCKET")
 AUG_FAIL_DUP_K = int(os.getenv("AUG_FAIL_DUP_K", "3"))
 TRAIN_TIMEOUT_SEC = int(os.getenv("TRAIN_TIMEOUT_SEC", "1800"))
 DRIVER_TIMEOUT_SEC = int(os.getenv("DRIVER_TIMEOUT_SEC", "900"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "64"))
+LOG_TREE = os.getenv("MESHOPS_LOG_TREE") == "1"
+LOG_TREE_MAX_ENTRIES = 500
 
 # ─────────────────── FS ───────────────────
 JOBS_ROOT = Path("/jobs")
+TOMB_ROOT = JOBS_ROOT / ".tomb"   # finished workspaces awaiting background deletion
 
 # ─────────────────── Utilities ───────────────────
 def now_ts():
@@ -63,12 +80,30 @@ def sha256_file(p: Path) -> str:
             h.update(chunk)
     return h.hexdigest()
 
-def boto_client(service: str):
+def write_json(p: Path, obj):
+    if orjson is not None:
+        p.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        p.write_text(json.dumps(obj, indent=2))
+
+def link_or_copy(src: Path, dst: Path):
+    """Hardlink dst to src; fall back to a byte copy across devices / on FS without links.
+    No-op when both are the same path (the object already sits where it is wanted)."""
+    if dst.absolute() == src.absolute():
+        return
+    try:
+        dst.unlink(missing_ok=True)
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def boto_client(service: str, **kwargs):
     return boto3.client(
         service,
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
         aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
         region_name=AWS_REGION,
+        **kwargs,
     )
 
 def log_append(logf: Path, msg: str, also_print=True):
@@ -78,6 +113,19 @@ def log_append(logf: Path, msg: str, also_print=True):
     if also_print:
         print(line, flush=True)
 
+def log_tree(logf: Path, root: Path, title: str):
+    """Dump the directory layout as ONE log entry (opt-in via MESHOPS_LOG_TREE=1)."""
+    if not LOG_TREE:
+        return
+    lines, room = [title], LOG_TREE_MAX_ENTRIES
+    for d, _, files in os.walk(root):
+        if room <= 0:
+            lines.append("...(truncated)")
+            break
+        lines.append(f"{os.path.relpath(d, root)}/ -> {files[:room]}")
+        room -= len(files) + 1
+    log_append(logf, "\n".join(lines))
+
 # ─────────────────── Live runner ───────────────────
 def run_live(cmd, cwd, log_file, timeout):
     log_append(log_file, f"[RUN] {' '.join(cmd)} (cwd={cwd})")
@@ -123,6 +171,51 @@ def s3_download_file(bucket, key, dest: Path):
     ensure_dir(dest.parent)
     boto_client("s3").download_file(bucket, key, str(dest))
 
+async def _s3_download_many_async(bucket, pairs, concurrency):
+    session = aioboto3.Session(
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=AWS_REGION,
+    )
+    sem = asyncio.Semaphore(concurrency)
+    async with session.client("s3", config=Config(max_pool_connections=concurrency)) as s3:
+        async def one(key, dest):
+            # aioboto3 writes straight into Filename: land it under .part, rename on success
+            part = dest.with_suffix(dest.suffix + ".part")
+            async with sem:
+                try:
+                    ensure_dir(dest.parent)
+                    await s3.download_file(bucket, key, str(part))
+                    os.replace(part, dest)
+                    return key, dest, None
+                except Exception as e:
+                    part.unlink(missing_ok=True)
+                    return key, dest, e
+        return await asyncio.gather(*(one(k, d) for k, d in pairs))
+
+def s3_download_many(bucket, pairs, concurrency=S3_MAX_CONCURRENCY):
+    """Download [(key, dest)] concurrently. Returns [(key, dest, error|None)] in input order."""
+    if not pairs:
+        return []
+    if aioboto3 is not None:
+        return asyncio.run(_s3_download_many_async(bucket, pairs, concurrency))
+
+    s3 = boto_client("s3", config=Config(max_pool_connections=concurrency))
+    def one(pair):
+        key, dest = pair
+        try:
+            ensure_dir(dest.parent)  # per item: one bad destination is that item's error
+            s3.download_file(bucket, key, str(dest))
+            return key, dest, None
+        except Exception as e:
+            return key, dest, e
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        return list(ex.map(one, pairs))
+
+def s3_not_found(err) -> bool:
+    code = getattr(err, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
 def s3_upload_file(local: Path, bucket, key):
     boto_client("s3").upload_file(str(local), bucket, key)
 
@@ -136,7 +229,7 @@ def parse_args():
         sys.exit(1)
     job_id = sys.argv[1]
     save_base = sys.argv[2].strip().strip("/")
-    s3_keys = [k.strip().strip("/") for k in sys.argv[3:]]
+    s3_keys = [k.strip().lstrip("/") for k in sys.argv[3:]]   # keep trailing "/" = folder
     return job_id, save_base, s3_keys
 
 # ─────────────────── Download Inputs ───────────────────
@@ -161,102 +254,94 @@ def download_inputs(job_dir: Path, keys: List[str], logs: Path):
     
     ── Rules ──
       • If key is a prefix (folder), mirror its entire tree under job_dir/<same_prefix>.
+        A trailing "/" marks a folder up front; other keys are tried as objects first
+        and only listed as folders when the object does not exist.
       • If key is a single file, put it at job_dir/<same_relative_path>.
       • Do NOT flatten 'images/train' or 'images/val' — they stay where they are.
-      • If we see train.py / predict.py / driver.py anywhere, also copy them to the job root.
+      • If we see train.py / predict.py / driver.py anywhere, also hardlink them into the job root.
       • If we see tests*.csv, keep their original path AND add them to tests list.
     """
     s3 = boto_client("s3")
     out = {"train_py": None, "predict_py": None, "driver_py": None, "tests_csv_paths": []}
 
-    def is_prefix(k: str) -> bool:
-        """Return True if k is an S3 prefix (i.e. a folder), False if it's an object/file."""
-        try:
-            s3.head_object(Bucket=S3_BUCKET, Key=k)
-            return False
-        except Exception:
-            pfx = k if k.endswith("/") else k + "/"
-            resp = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=pfx, MaxKeys=1)
-            return resp.get("KeyCount", 0) > 0
-
-    def list_all(prefix: str) -> List[str]:
-        """List all objects under a given prefix."""
-        pfx = prefix if prefix.endswith("/") else prefix + "/"
-        keys_acc = []
+    def walk_key(k: str):
+        """Yield object keys under k/ from a single paginator; yields nothing if k is a plain object."""
+        pfx = k if k.endswith("/") else k + "/"
         paginator = s3.get_paginator("list_objects_v2")
         for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=pfx):
             for obj in page.get("Contents", []):
-                k = obj.get("Key")
-                if k and not k.endswith("/"):
-                    keys_acc.append(k)
-        return keys_acc
-
+                kk = obj.get("Key")
+                if kk and not kk.endswith("/"):
+                    yield kk
+
+    def plan_folder(key: str):
+        # full S3 key relative path → same structure under job_dir
+        folder = [(k, job_dir / Path(k)) for k in walk_key(key)]
+        if folder:
+            log_append(logs, f"Mirroring folder {key} → {job_dir}/{key} ({len(folder)} objects)")
+        return folder
+
+    # ── Plan: a trailing "/" marks a folder; anything else is fetched as an object first ──
+    pairs = []
     for key in keys:
         try:
-            if is_prefix(key):
-                # ── Mirror entire folder ──
-                base_src_prefix = key if key.endswith("/") else key + "/"
-                keys_under = list_all(base_src_prefix)
-                if not keys_under:
+            if classify_key(key) == "prefix":
+                folder = plan_folder(key)
+                if not folder:
                     log_append(logs, f"[WARN] empty prefix: {key}")
-                    continue
-
-                for k in keys_under:
-                    rel_path = Path(k)               # full S3 key relative path
-                    dest = job_dir / rel_path        # keep same structure under job_dir
-                    ensure_dir(dest.parent)
-                    s3_download_file(S3_BUCKET, k, dest)
-
-                    nm = dest.name.lower()
-                    if nm == "train.py":
-                        shutil.copyfile(dest, job_dir / "train.py")
-                        out["train_py"] = job_dir / "train.py"
-                    elif nm == "predict.py":
-                        shutil.copyfile(dest, job_dir / "predict.py")
-                        out["predict_py"] = job_dir / "predict.py"
-                    elif nm == "driver.py":
-                        shutil.copyfile(dest, job_dir / "driver.py")
-                        out["driver_py"] = job_dir / "driver.py"
-                    elif nm.endswith(".csv") and "tests" in nm:
-                        out["tests_csv_paths"].append(dest)
-
-                log_append(logs, f"Mirrored folder {key} → {job_dir}/{key}")
-            
+                pairs.extend(folder)
             else:
-                # ── Single object/file ──
                 unixk = key.replace("\\", "/")
-                rel_path = Path(unixk)
-                dest = job_dir / rel_path           # preserve path
-                ensure_dir(dest.parent)
-                s3_download_file(S3_BUCKET, unixk, dest)
-
-                nm = dest.name.lower()
-                if nm == "train.py":
-                    shutil.copyfile(dest, job_dir / "train.py")
-                    out["train_py"] = job_dir / "train.py"
-                elif nm == "predict.py":
-                    shutil.copyfile(dest, job_dir / "predict.py")
-                    out["predict_py"] = job_dir / "predict.py"
-                elif nm == "driver.py":
-                    shutil.copyfile(dest, job_dir / "driver.py")
-                    out["driver_py"] = job_dir / "driver.py"
-                elif nm.endswith(".csv") and "tests" in nm:
-                    out["tests_csv_paths"].append(dest)
-
-                log_append(logs, f"Fetched file {unixk}")
-
+                pairs.append((unixk, job_dir / Path(unixk)))   # preserve path
         except Exception as e:
             log_append(logs, f"[ERROR] Download failed {key}: {e}")
 
+    # ── Fetch: all objects in flight at once; keys that 404 as objects are retried as folders ──
+    results, retry = [], []
+    for k, dest, err in s3_download_many(S3_BUCKET, pairs):
+        folder = []
+        if err is not None and s3_not_found(err):
+            try:
+                folder = plan_folder(k)
+            except Exception as e:
+                err = e
+        if folder:
+            retry.extend(folder)
+        else:
+            results.append((k, dest, err))
+    results.extend(s3_download_many(S3_BUCKET, retry))
+
+    fetched = 0
+    for k, dest, err in results:
+        if err is not None:
+            log_append(logs, f"[ERROR] Download failed {k}: {err}")
+            continue
+        fetched += 1
+
+        nm = dest.name.lower()
+        if nm == "train.py":
+            link_or_copy(dest, job_dir / "train.py")
+            out["train_py"] = job_dir / "train.py"
+        elif nm == "predict.py":
+            link_or_copy(dest, job_dir / "predict.py")
+            out["predict_py"] = job_dir / "predict.py"
+        elif nm == "driver.py":
+            link_or_copy(dest, job_dir / "driver.py")
+            out["driver_py"] = job_dir / "driver.py"
+        elif nm.endswith(".csv") and "tests" in nm:
+            out["tests_csv_paths"].append(dest)
+    log_append(logs, f"Fetched {fetched}/{len(results)} objects")
+
     # ── Log full tree after download ──
-    for root, dirs, files in os.walk(job_dir):
-        rel = Path(root).relative_to(job_dir)
-        log_append(logs, f"{rel}/ -> {files}")
+    log_tree(logs, job_dir, "=== Directory layout after download ===")
 
     return out
 
 
 # ─────────────────── Merge tests ───────────────────
+TESTS_COLS = ["name", "input", "category", "severity", "expected", "predicted", "result"]
+TESTS_DTYPES = {"category": "category", "result": "category", "severity": "category"}
+
 def merge_tests_and_build_yaml(job_dir, tests_paths, logs):
     merged_csv = job_dir / "tests_merged.csv"
     tests_yaml = job_dir / "tests.yaml"
@@ -266,7 +351,8 @@ def merge_tests_and_build_yaml(job_dir, tests_paths, logs):
         log_append(logs, "No tests to merge.")
         return merged_csv, tests_yaml
     try:
-        frames = [pd.read_csv(p) for p in tests_paths]
+        frames = [pd.read_csv(p, engine="c", usecols=lambda c: c in TESTS_COLS, dtype=TESTS_DTYPES)
+                  for p in tests_paths]
         if not frames:
             raise ValueError("no frames")
         dfm = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
@@ -283,15 +369,13 @@ def merge_tests_and_build_yaml(job_dir, tests_paths, logs):
             rows = dfm.iloc[0:0]  # empty
 
         scenarios = []
-        for _, r in rows.iterrows():
-            inp = r.get("input"); exp = r.get("expected")
-            if not (isinstance(inp, str) and isinstance(exp, str)): continue
-            scenarios.append({  
-                "name": str(r.get("name", Path(inp).name)),
-                "function": "predict",
-                "input": inp,
-                "expected": exp
-            })
+        if col("input") and col("expected"):
+            valid = rows[rows["input"].map(type).eq(str) & rows["expected"].map(type).eq(str)]
+            inputs = valid["input"].tolist()
+            names = (valid["name"].astype(str).tolist() if col("name")
+                     else [Path(i).name for i in inputs])
+            scenarios = [{"name": n, "function": "predict", "input": i, "expected": e}
+                         for n, i, e in zip(names, inputs, valid["expected"].tolist())]
 
         with open(tests_yaml, "w") as f:
             yaml.safe_dump({"scenarios": scenarios}, f, sort_keys=False)
@@ -330,7 +414,7 @@ def augment_from_failed(job_dir, merged_csv, logs):
             else: continue
         tgt_dir = ensure_dir(train_root / exp)
         for i in range(max(1, AUG_FAIL_DUP_K)):
-            shutil.copyfile(src, tgt_dir / f"aug_{Path(src).stem}_dup{i}{Path(src).suffix}")
+            link_or_copy(src, tgt_dir / f"aug_{Path(src).stem}_dup{i}{Path(src).suffix}")
             added += 1
     log_append(logs, f"Augmented {added} samples.")
 
@@ -345,10 +429,7 @@ def run_train(job_dir, logs):
         raise RuntimeError("train.py missing at job root")
 
     # ── Log current directory structure for debugging ──
-    log_append(logs, "=== Directory layout before training ===")
-    for root, _, files in os.walk(job_dir):
-        rel = os.path.relpath(root, job_dir)
-        log_append(logs, f"{rel}/ -> {files}")
+    log_tree(logs, job_dir, "=== Directory layout before training ===")
 
     # ── Run user’s training script ──
     run_live(["python3", str(train_py)], str(job_dir), logs, TRAIN_TIMEOUT_SEC)
@@ -394,8 +475,9 @@ def run_driver_or_min_eval(job_dir, tests_yaml, logs):
 
 # ─────────────────── Uploads ───────────────────
 def upload_outputs(job_dir, save_base, model_path, logs):
-    """Upload outputs to S3, handling missing files gracefully"""
+    """Upload outputs to S3 concurrently, handling missing files gracefully"""
     mapping = {}
+    uploads = []   # (mapping name, local path, s3 key)
     
     # Upload model if it exists and is valid (not corrupted/placeholder)
     if model_path and model_path.exists():
@@ -407,9 +489,7 @@ def upload_outputs(job_dir, save_base, model_path, logs):
                                  f"likely a placeholder/corrupted. Skipping upload.")
             else:
                 model_key = f"{save_base}/{'model.pt' if model_path.suffix == '.pt' else 'model.pkl'}"
-                s3_upload_file(model_path, S3_BUCKET, model_key)
-                mapping["model"] = f"s3://{S3_BUCKET}/{model_key}"
-                log_append(logs, f"Uploaded model ({file_size} bytes) to {model_key}")
+                uploads.append(("model", model_path, model_key))
         except Exception as e:
             log_append(logs, f"[WARN] Failed to upload model: {e}")
     
@@ -419,14 +499,26 @@ def upload_outputs(job_dir, save_base, model_path, logs):
                  "tests.csv", "tests_merged.csv", "final_retrain_report.json", "tests.yaml"]:
         p = job_dir / name
         if p.exists():
+            uploads.append((name, p, f"{retr}/{name}"))
+        else:
+            log_append(logs, f"[INFO] {name} not found, skipping upload")
+
+    if not uploads:
+        return mapping
+
+    s3 = boto_client("s3")
+    with ThreadPoolExecutor(max_workers=len(uploads)) as ex:
+        futures = [ex.submit(s3.upload_file, str(p), S3_BUCKET, key) for _, p, key in uploads]
+        for fut, (name, p, key) in zip(futures, uploads):
             try:
-                s3_upload_file(p, S3_BUCKET, f"{retr}/{name}")
-                mapping[name] = f"s3://{S3_BUCKET}/{retr}/{name}"
-                log_append(logs, f"Uploaded {name}")
+                fut.result()
+                mapping[name] = f"s3://{S3_BUCKET}/{key}"
+                if name == "model":
+                    log_append(logs, f"Uploaded model ({p.stat().st_size} bytes) to {key}")
+                else:
+                    log_append(logs, f"Uploaded {name}")
             except Exception as e:
                 log_append(logs, f"[WARN] Failed to upload {name}: {e}")
-        else:
-            log_append(logs, f"[INFO] {name} not found, skipping upload")
     
     return mapping
 
@@ -456,7 +548,7 @@ def write_manifest(job_dir, model_path):
     }
     
     try:
-        (job_dir / "manifest.json").write_text(json.dumps(manifest_data, indent=2))
+        write_json(job_dir / "manifest.json", manifest_data)
     except Exception as e:
         print(f"[WARN] Failed to write manifest: {e}")
 
@@ -474,7 +566,7 @@ def write_final_report(job_dir, job_id, save_base, s3_map, status, error=""):
     }
     
     try:
-        (job_dir / "final_retrain_report.json").write_text(json.dumps(rep, indent=2))
+        write_json(job_dir / "final_retrain_report.json", rep)
     except Exception as e:
         print(f"[ERROR] Failed to write final report: {e}")
 
@@ -489,8 +581,16 @@ def cleanup_workspace(job_dir: Path, logs: Path):
             except Exception:
                 pass
             
-            # Remove the entire job directory
-            shutil.rmtree(str(job_dir), ignore_errors=True)
+            # Move the job directory aside (one rename) and reclaim it off the critical path
+            tomb = None
+            try:
+                tomb = ensure_dir(TOMB_ROOT) / f"{job_dir.name}-{uuid.uuid4().hex}"
+                os.rename(job_dir, tomb)
+                subprocess.Popen(["rm", "-rf", str(tomb)], start_new_session=True,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except OSError:
+                # no tomb dir / rename / rm: delete inline like before
+                shutil.rmtree(str(tomb if tomb is not None and tomb.exists() else job_dir), ignore_errors=True)
             print(f"[INFO] Cleaned up workspace: {job_dir}")
         else:
             print(f"[INFO] Workspace {job_dir} already cleaned up")
@@ -1,9 +1,16 @@
+import atexit
+import copy
 import json
 import os
 import time
-from threading import RLock
+from threading import RLock, Timer
 from typing import Dict, Any
 
+try:
+    import orjson
+except Exception:
+    orjson = None
+
 _DEFAULT: Dict[str, Any] = {
     "w": [0.4, 0.3, 0.2, 0.1],  # weights for [drift, entropy, cost, fatigue]
     "theta": 0.5,               # decision threshold
@@ -11,34 +18,97 @@ _DEFAULT: Dict[str, Any] = {
 }
 
 class StateStore:
-    def __init__(self, path: str):
+    """JSON-backed controller state with an in-memory copy.
+
+    The copy is re-read only when the file's (mtime_ns, size) differs from our last
+    read/write, so writes by other processes are picked up. flush_interval=0 writes
+    through on every update; with flush_interval>0 updates are coalesced into one write
+    per interval (plus flush() / interpreter exit), for hot loops that update every
+    round — while such writes are pending, the in-memory copy wins."""
+
+    def __init__(self, path: str, flush_interval: float = 0.0):
         self.path = path
+        self.flush_interval = flush_interval
         self._lock = RLock()
+        self._dirty = False
+        self._timer = None
+        self._sig = None
         d = os.path.dirname(path)
         if d:
             os.makedirs(d, exist_ok=True)
-        if not os.path.exists(path):
-            self._write(_DEFAULT)
+        if os.path.exists(path):
+            self._load()
+        else:
+            self._cache = copy.deepcopy(_DEFAULT)
+            self._store()
+        if flush_interval > 0:
+            atexit.register(self.flush)
 
     def _read(self) -> Dict[str, Any]:
-        with open(self.path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     def _write(self, obj: Dict[str, Any]) -> None:
         tmp = self.path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(obj, f, indent=2)
+        # compact bytes in one write; orjson when available, else stdlib json
+        data = orjson.dumps(obj) if orjson is not None else json.dumps(obj, separators=(",", ":")).encode()
+        with open(tmp, "wb") as f:
+            f.write(data)
         os.replace(tmp, self.path)
 
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> None:
+        sig = self._stat()
+        self._cache = self._read()
+        self._sig = sig
+
+    def _store(self) -> None:
+        self._write(self._cache)
+        self._sig = self._stat()
+
+    def _refresh(self) -> None:
+        """Reload if the file changed since our last read/write (one stat otherwise)."""
+        if not self._dirty and self._stat() != self._sig and os.path.exists(self.path):
+            self._load()
+
     def get(self) -> Dict[str, Any]:
         with self._lock:
-            return self._read()
+            self._refresh()
+            return copy.deepcopy(self._cache)
 
-    def update(self, **kwargs) -> None:
+    def modify(self, fn) -> None:
+        """Read-modify-write: fn(state) returns the keys to update."""
+        with self._lock:
+            self._refresh()
+            self._cache.update(copy.deepcopy(fn(self._cache)))  # never alias caller objects
+            if self.flush_interval <= 0:
+                self._store()
+                return
+            self._dirty = True
+            if self._timer is None:
+                self._timer = Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Write pending in-memory updates (no-op in write-through mode)."""
         with self._lock:
-            st = self._read()
-            st.update(kwargs)
-            self._write(st)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._store()
+                self._dirty = False
+
+    def update(self, **kwargs) -> None:
+        self.modify(lambda _: kwargs)
 
     def mark_retrain_now(self) -> None:
         self.update(last_retrain_ts=time.time())
@@ -1,37 +1,91 @@
 import sys
+import functools
 import torch
 from torchvision import transforms, models
+from torch.utils.data import DataLoader, Dataset
 from PIL import Image
 
-# 🔹 Load model
+# 🔹 Device
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = models.resnet18(pretrained=False)
-model.fc = torch.nn.Linear(model.fc.in_features, 2)  # 2 classes
-model.load_state_dict(torch.load("model.pt", map_location=device))
-model.eval()
+use_half = device.type == "cuda"  # FP16 on GPU; CPU stays FP32
 
 # 🔹 Labels
 idx_to_class = {0: "cat", 1: "dog"}
 
 # 🔹 Transform
 transform = transforms.Compose([
-    transforms.Resize((224, 224)),
+    transforms.Resize((224, 224), interpolation=transforms.InterpolationMode.BILINEAR),
     transforms.ToTensor(),
     transforms.Normalize([0.485, 0.456, 0.406],
                          [0.229, 0.224, 0.225])
 ])
 
+# 🔹 Open as RGB; for JPEGs let libjpeg decode at the smallest scale still ≥ 224×224
+def load_rgb(img_path: str, size=(224, 224)) -> Image.Image:
+    img = Image.open(img_path)
+    img.draft("RGB", size)
+    return img.convert("RGB")
+
+# 🔹 Load model once per process (drivers can import predict() and reuse it)
+@functools.lru_cache(maxsize=1)
+def get_model():
+    model = models.resnet18(pretrained=False)
+    model.fc = torch.nn.Linear(model.fc.in_features, 2)  # 2 classes
+    model.load_state_dict(torch.load("model.pt", map_location=device, weights_only=True))
+    model = model.to(device).eval()
+    if use_half:
+        model = model.half()
+    return model
+
 # 🔹 Predict on given image
-if len(sys.argv) < 2:
-    print("Usage: python predict.py <image_path>")
-    sys.exit(1)
+def predict(img_path: str) -> str:
+    model = get_model()
+    img = load_rgb(img_path)
+    img_t = transform(img).unsqueeze(0).to(device, non_blocking=True)
+    if use_half:
+        img_t = img_t.half()
+
+    with torch.inference_mode():
+        outputs = model(img_t)
+        _, pred = outputs.max(1)
+    return idx_to_class[pred.item()]
+
+# 🔹 Batched prediction over many images (one forward pass per batch)
+class ImageListDataset(Dataset):
+    def __init__(self, paths, transform):
+        self.paths = list(paths)
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        return self.transform(load_rgb(self.paths[i]))
+
+def predict_batch(paths, batch_size=32, num_workers=4):
+    """Yield one label per path, in order."""
+    model = get_model()
+    loader = DataLoader(ImageListDataset(paths, transform), batch_size=batch_size,
+                        num_workers=num_workers, pin_memory=device.type == "cuda")
+    with torch.inference_mode():
+        for xb in loader:
+            xb = xb.to(device, non_blocking=True)
+            if use_half:
+                xb = xb.half()
+            for idx in model(xb).argmax(1).tolist():
+                yield idx_to_class[idx]
 
-img_path = sys.argv[1]
-img = Image.open(img_path).convert("RGB")
-img_t = transform(img).unsqueeze(0)
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        with open(sys.argv[2]) as f:
+            paths = [ln.strip() for ln in f if ln.strip()]
+        for img_path, label in zip(paths, predict_batch(paths)):
+            print(f"Prediction for {img_path}: {label}")
+        sys.exit(0)
 
-with torch.no_grad():
-    outputs = model(img_t)
-    _, pred = outputs.max(1)
+    if len(sys.argv) < 2:
+        print("Usage: python predict.py <image_path> | --batch <file_list.txt>")
+        sys.exit(1)
 
-print(f"Prediction for {img_path}: {idx_to_class[pred.item()]}")
+    img_path = sys.argv[1]
+    print(f"Prediction for {img_path}: {predict(img_path)}")
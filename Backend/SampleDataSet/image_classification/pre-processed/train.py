@@ -5,6 +5,8 @@ import torch.optim as optim
 from torchvision import transforms, models
 from torch.utils.data import DataLoader
 
+from predict import load_rgb  # same JPEG draft decode as inference (no train/serve skew)
+
 # 🔹 Data transforms
 transform = transforms.Compose([
     transforms.Resize((224, 224)),
@@ -14,8 +16,8 @@ transform = transforms.Compose([
 ])
 
 # 🔹 Datasets
-train_data = torchvision.datasets.ImageFolder("images/train", transform=transform)
-val_data   = torchvision.datasets.ImageFolder("images/val", transform=transform)
+train_data = torchvision.datasets.ImageFolder("images/train", transform=transform, loader=load_rgb)
+val_data   = torchvision.datasets.ImageFolder("images/val", transform=transform, loader=load_rgb)
 
 train_loader = DataLoader(train_data, batch_size=16, shuffle=True)
 val_loader   = DataLoader(val_data, batch_size=16)
@@ -1,36 +1,51 @@
 import pandas as pd
 import joblib
+import csv
 import sys
+from scipy.special import expit
+
+# Known numeric features → float32 (halves bytes vs. default float64)
+FEATURE_DTYPES = {"amount": "float32", "duration": "float32", "age": "float32", "is_international": "float32"}
+CHUNK_ROWS = 100_000
 
 def predict(input_path="dataset.csv", model_path="model.pkl", output_path="predictions.csv"):
-    # Load model
+    # Load model (+ training-set medians for NaN filling, when train.py attached them)
     model = joblib.load(model_path)
+    medians = getattr(model, "feature_medians_", None)
+    if medians is None:
+        # Older models: one pass for whole-file medians (as before), so fills don't depend on chunk boundaries
+        medians = pd.read_csv(input_path, dtype=FEATURE_DTYPES,
+                              usecols=lambda c: c not in ("is_fraud", "transaction_id")).median()
+
+    # Stream data in chunks and write predictions as we go
+    offset = 0
+    with open(output_path, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["transaction_id", "predicted", "probability"])
+        for df in pd.read_csv(input_path, chunksize=CHUNK_ROWS, dtype=FEATURE_DTYPES):
+            if "transaction_id" in df.columns:
+                ids = df["transaction_id"].tolist()
+            else:
+                ids = range(offset, offset + len(df))
+            offset += len(df)
+
+            X = df.drop(columns=[c for c in ["is_fraud", "transaction_id"] if c in df.columns])
+            X = X.fillna(medians)
+
+            # Predict: binary linear models need one margin pass for both label and probability
+            scores = model.decision_function(X) if hasattr(model, "decision_function") else None
+            if scores is not None and scores.ndim == 1:
+                probs = expit(scores)
+                preds = model.classes_[(scores > 0).astype(int)]
+            else:
+                preds = model.predict(X)
+                try:
+                    probs = model.predict_proba(X)[:, 1]
+                except Exception:
+                    probs = preds
+
+            writer.writerows(zip(ids, preds.tolist(), probs.tolist()))
 
-    # Load data
-    df = pd.read_csv(input_path)
-    if "transaction_id" in df.columns:
-        ids = df["transaction_id"]
-    else:
-        ids = range(len(df))
-
-    X = df.drop(columns=[c for c in ["is_fraud", "transaction_id"] if c in df.columns])
-    X = X.fillna(X.median())
-
-    # Predict
-    preds = model.predict(X)
-    probs = None
-    try:
-        probs = model.predict_proba(X)[:, 1]
-    except Exception:
-        pass
-
-    # Save output
-    out = pd.DataFrame({
-        "transaction_id": ids,
-        "predicted": preds,
-        "probability": probs if probs is not None else preds
-    })
-    out.to_csv(output_path, index=False)
     print(f"[Automesh.ai] Predictions saved to {output_path}")
 
 if __name__ == "__main__":
@@ -17,8 +17,9 @@ def train(input_path="dataset.csv", model_path="model.pkl"):
     X = df.drop(columns=["is_fraud"])
     y = df["is_fraud"]
 
-    # Handle NaNs
-    X = X.fillna(X.median())
+    # Handle NaNs (medians ride along on the model so predict.py fills with training statistics)
+    medians = X.median().astype("float32")
+    X = X.fillna(medians)
 
     # Train/test split
     X_train, X_test, y_train, y_test = train_test_split(
@@ -27,13 +28,14 @@ def train(input_path="dataset.csv", model_path="model.pkl"):
 
     # Try LogisticRegression → fallback RandomForest
     try:
-        model = LogisticRegression(max_iter=500, random_state=42)
+        model = LogisticRegression(max_iter=500, solver="lbfgs", random_state=42)
         model.fit(X_train, y_train)
     except Exception:
         model = RandomForestClassifier(n_estimators=100, random_state=42)
         model.fit(X_train, y_train)
 
-    # Save trained model
+    # Save trained model (still a plain estimator for every .predict consumer)
+    model.feature_medians_ = medians
     joblib.dump(model, model_path)
     print(f"[Automesh.ai] Model saved to {model_path}")
 
@@ -7,9 +7,15 @@ runner.py - minimal Automesh runner with debug logs
  - captures driver stdout to driver_stdout.log
 """
 
-import argparse, os, sys, subprocess, shutil, time, traceback
+import argparse, os, sys, subprocess, threading, time, traceback
 from pathlib import Path
 
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+except Exception:
+    boto3 = None
+
 def ts(): return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
 def log(msg): print(f"[{ts()}] {msg}", flush=True)
 
@@ -53,10 +59,58 @@ def fetch_extras(base_s3: str, work_dir: str):
         if rc != 0:
             log(f"WARNING: could not fetch {s3_path} (maybe missing)")
 
-def safe_cp_local_to_s3(local_dir: str, s3_path: str) -> bool:
-    log(f"DEBUG >>> Uploading {local_dir} -> {s3_path}")
-    cmd = ["aws", "s3", "cp", str(local_dir), s3_path.rstrip("/") + "/", "--recursive"]
-    return run_stream_with_log(cmd) == 0
+def split_s3(s3_path: str):
+    """s3://bucket/some/prefix/ -> (bucket, "some/prefix")"""
+    bucket, _, prefix = s3_path.replace("s3://", "", 1).partition("/")
+    return bucket, prefix.strip("/")
+
+def safe_upload_files_to_s3(files, s3_path: str) -> bool:
+    """Upload files straight from their original paths (multipart + threaded for large ones)."""
+    dest = s3_path.rstrip("/") + "/"
+    log(f"DEBUG >>> Uploading {[f.name for f in files]} -> {dest}")
+    if boto3 is None:
+        return all(run_stream_with_log(["aws", "s3", "cp", str(f), dest]) == 0 for f in files)
+
+    bucket, prefix = split_s3(s3_path)
+    s3 = boto3.client("s3")
+    tc = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=10, use_threads=True)
+    try:
+        for f in files:
+            key = f"{prefix}/{f.name}" if prefix else f.name
+            s3.upload_file(str(f), bucket, key, Config=tc)
+            log(f"DEBUG >>> Uploaded {f.name} -> s3://{bucket}/{key}")
+    except Exception as e:
+        log(f"DEBUG >>> upload error: {e}")
+        return False
+    return True
+
+def start_log_streamer(log_file: Path, s3_path: str, interval: float = 5.0):
+    """Push log_file to s3_path every `interval` seconds while the driver runs. Returns stop()."""
+    if boto3 is None:
+        return lambda: None
+    bucket, prefix = split_s3(s3_path)
+    key = f"{prefix}/{log_file.name}" if prefix else log_file.name
+    s3 = boto3.client("s3")
+    stop_evt = threading.Event()
+
+    def loop():
+        last_size = -1
+        while not stop_evt.wait(interval):
+            try:
+                size = log_file.stat().st_size
+                if size != last_size:
+                    s3.put_object(Bucket=bucket, Key=key, Body=log_file.read_bytes())
+                    last_size = size
+            except Exception as e:
+                log(f"DEBUG >>> WARNING: live log upload failed: {e}")
+
+    t = threading.Thread(target=loop, daemon=True)
+    t.start()
+
+    def stop():
+        stop_evt.set()
+        t.join()
+    return stop
 
 # ==================== MAIN ====================
 
@@ -88,18 +142,22 @@ def main():
 
     driver_log = Path(work_dir) / "driver_stdout.log"
     log("DEBUG >>> Invoking driver.py...")
-    rc = run_stream_with_log(
-        ["python3", str(driver_path), "--base_dir", work_dir],
-        cwd=work_dir,
-        log_file=driver_log
-    )
+    # Stream the driver log to S3 while it runs; the final upload below flushes the complete file
+    stop_streamer = (start_log_streamer(driver_log, args.out_s3)
+                     if args.out_s3 and not args.no_upload else (lambda: None))
+    try:
+        rc = run_stream_with_log(
+            ["python3", str(driver_path), "--base_dir", work_dir],
+            cwd=work_dir,
+            log_file=driver_log
+        )
+    finally:
+        stop_streamer()
     log(f"DEBUG >>> Driver exit code {rc}")
 
     # ✅ Collect artifacts
     if args.out_s3 and not args.no_upload:
         log(f"DEBUG >>> Checking for artifacts in {work_dir}")
-        artifacts_dir = Path(work_dir) / "artifacts_out"
-        artifacts_dir.mkdir(exist_ok=True)
 
         keep_files = [
             "tests.csv",
@@ -116,19 +174,15 @@ def main():
             src = Path(work_dir) / fname
             log(f"DEBUG >>> Looking for {src}")
             if src.exists():
-                try:
-                    shutil.copy(src, artifacts_dir / fname)
-                    collected.append(fname)
-                    log(f"DEBUG >>> Collected {fname}")
-                except Exception as e:
-                    log(f"DEBUG >>> WARNING: could not copy {fname}: {e}")
+                collected.append(src)
+                log(f"DEBUG >>> Collected {fname}")
 
         if collected:
-            log(f"DEBUG >>> Uploading artifacts: {collected}")
+            log(f"DEBUG >>> Uploading artifacts: {[f.name for f in collected]}")
         else:
             log("DEBUG >>> WARNING: No artifacts found to upload!")
 
-        if not safe_cp_local_to_s3(str(artifacts_dir), args.out_s3):
+        if not safe_upload_files_to_s3(collected, args.out_s3):
             log("ERROR: upload failed")
             sys.exit(5)
 
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import os, sys, subprocess, json, boto3, traceback, shutil
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 LOG_FILE = None
 
@@ -57,15 +58,17 @@ def main():
     _, out_prefix = parse_s3(out_s3)
     s3 = boto3.client("s3")
 
-    # 1. Download known project files
+    # 1. Download known project files (in parallel; the boto3 client is thread-safe)
     files = ["driver.py","tests.yaml","dataset.csv","train.py","predict.py","requirements.txt"]
-    for f in files:
+    def fetch(f):
         try:
-            dest = os.path.join(workdir, f)
-            s3.download_file(bucket, f"{base_prefix}/{f}", dest)
-            log(f"Downloaded {f}")
+            s3.download_file(bucket, f"{base_prefix}/{f}", os.path.join(workdir, f))
+            return True
         except Exception:
-            log(f"Missing optional file: {f}")
+            return False
+    with ThreadPoolExecutor(max_workers=len(files)) as ex:
+        for f, ok in zip(files, ex.map(fetch, files)):
+            log(f"Downloaded {f}" if ok else f"Missing optional file: {f}")
 
     # 2. Install project requirements if present
     reqs = os.path.join(workdir, "requirements.txt")
@@ -1,12 +1,15 @@
 import joblib
 
 # Load trained model
-model = joblib.load("news_model.pkl")
+model = joblib.load("news_model.pkl", mmap_mode="r")  # coef_/idf_ arrays paged in on demand
+
+def predict_categories(texts):
+    """Predict AG News categories for many texts in one pipeline call."""
+    return list(model.predict(list(texts)))
 
 def predict_category(text: str):
     """Predict the AG News category for input text."""
-    pred = model.predict([text])[0]
-    return pred
+    return predict_categories([text])[0]
 
 if __name__ == "__main__":
     print("=== AG News Prediction Demo ===")
@@ -16,6 +19,5 @@ if __name__ == "__main__":
         "Manchester United wins Premier League after stunning comeback.",
         "Global markets fall as oil prices reach new highs.",
     ]
-    for s in samples:
-        label = predict_category(s)
+    for s, label in zip(samples, predict_categories(samples)):
         print(f"Input: {s}\n → Predicted Label: {label}\n")
@@ -1,8 +1,10 @@
 import pandas as pd
 
-# Load both splits exactly as they are
-train = pd.read_csv("train.csv")
-test = pd.read_csv("test.csv")
+# Load both splits (string/int8 dtypes: one buffer per column instead of a PyObject per cell)
+COLS = ["Class Index", "Title", "Description"]
+DTYPES = {"Class Index": "int8", "Title": "string", "Description": "string"}
+train = pd.read_csv("train.csv", usecols=COLS, dtype=DTYPES, engine="c")
+test = pd.read_csv("test.csv", usecols=COLS, dtype=DTYPES, engine="c")
 
 # Combine both sets
 df = pd.concat([train, test], axis=0).reset_index(drop=True)
@@ -20,13 +22,13 @@ label_map = {
 df["Label"] = df["Class Index"].map(label_map)
 
 # Create an auxiliary text column for model input
-df["Text"] = (df["Title"].astype(str) + " " + df["Description"].astype(str)).str.strip()
+df["Text"] = df["Title"].str.cat(df["Description"], sep=" ", na_rep="").str.strip()
 
 # Reorder columns for clarity
 df = df[["Class Index", "Label", "Title", "Description", "Text"]]
 
 # Save final dataset
-df.to_csv("dataset.csv", index=False, encoding="utf-8")
+df.to_csv("dataset.csv", index=False, encoding="utf-8", chunksize=50_000)
 
 print("[INFO] ✅ Combined dataset created successfully → dataset.csv")
 print(f"[INFO] Total records: {len(df)}")
@@ -1,7 +1,8 @@
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, confusion_matrix
 import joblib
@@ -23,17 +24,24 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42, stratify=y
 )
 
-# Build pipeline: TF-IDF + Logistic Regression (multi-class)
+# Build pipeline: hashed TF-IDF + Logistic Regression (multi-class)
 model = Pipeline([
-    ("tfidf", TfidfVectorizer(
-        max_features=30000,
+    # Hashing instead of a fitted vocabulary dict: token → column is a murmurhash
+    ("hv", HashingVectorizer(
+        n_features=1 << 20,
         ngram_range=(1, 2),
-        stop_words="english"
+        stop_words="english",
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32
     )),
+    ("tfidf", TfidfTransformer(sublinear_tf=True)),
     ("clf", LogisticRegression(
-        solver="liblinear",
-        multi_class="ovr",
-        max_iter=2000,
+        solver="saga",              # multinomial: one solve instead of 4 OvR fits
+        penalty="l2",
+        C=1.0,
+        max_iter=200,
+        tol=1e-3,
         class_weight="balanced"
     ))
 ])
@@ -41,6 +49,11 @@ model = Pipeline([
 print("[INFO] Training model...")
 model.fit(X_train, y_train)
 
+# Store LR weights as float32 (matches the float32 TF-IDF input; half the bytes per predict matvec)
+clf = model.named_steps["clf"]
+clf.coef_ = clf.coef_.astype(np.float32, copy=False)
+clf.intercept_ = clf.intercept_.astype(np.float32, copy=False)
+
 # Save model
 joblib.dump(model, "news_model.pkl")
 print("[INFO] Model saved → news_model.pkl")
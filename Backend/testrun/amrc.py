@@ -1,7 +1,7 @@
 import os
 import time
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 
 # ─────────────────────────────────────────────
 # Optional dependencies
@@ -25,6 +25,7 @@ try:
     from metrics import (
         load_reference_stats,
         load_csv_numeric_columns,
+        load_npy_numeric_columns,
         drift_wasserstein,
         entropy_from_probs,
         estimate_cost_minutes,
@@ -45,6 +46,9 @@ except ImportError:
     def load_csv_numeric_columns(path: str) -> Dict:
         return {}
 
+    def load_npy_numeric_columns(path: str) -> Dict:
+        return {}
+
     def drift_wasserstein(ref_stats: Dict, new_cols: Dict) -> float:
         return 0.0
 
@@ -61,6 +65,44 @@ except ImportError:
             return 0.0
 
 
+def _clip(x: float, lo: float, hi: float) -> float:
+    """Scalar clamp; avoids a 0-d ndarray round-trip per signal."""
+    return lo if x < lo else hi if x > hi else x
+
+def _nbytes(val) -> int:
+    """Array bytes held by a cached value (column dicts); parsed JSON stats count as ~0."""
+    if isinstance(val, dict):
+        return sum(getattr(v, "nbytes", 0) for v in val.values())
+    return getattr(val, "nbytes", 0)
+
+def _cached_by_stat(fn, maxsize: int = 32, max_bytes: int = 256 << 20):
+    """Memoize a path loader so unchanged files skip disk + parsing.
+    One entry per path, replaced when its (mtime_ns, size) changes; LRU-bounded by count and bytes."""
+    cache: Dict = {}  # path -> (sig, value, nbytes), least recently used first
+    total = 0
+    def wrap(path: str):
+        nonlocal total
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+        entry = cache.pop(path, None)
+        if entry is not None:
+            total -= entry[2]
+            if entry[0] != sig:
+                entry = None  # file rewritten: drop the stale copy before reloading
+        if entry is None:
+            val = fn(path)
+            entry = (sig, val, _nbytes(val))
+        cache[path] = entry
+        total += entry[2]
+        while len(cache) > maxsize or (total > max_bytes and len(cache) > 1):
+            total -= cache.pop(next(iter(cache)))[2]  # evict least recently used
+        return entry[1]
+    return wrap
+
+_load_reference_stats_cached = _cached_by_stat(load_reference_stats)
+_load_csv_numeric_columns_cached = _cached_by_stat(load_csv_numeric_columns)
+_load_npy_numeric_columns_cached = _cached_by_stat(load_npy_numeric_columns)
+
 # ─────────────────────────────────────────────
 # Config dataclass
 # ─────────────────────────────────────────────
@@ -73,6 +115,7 @@ class AMRCConfig:
     lr: float = 0.05        # adaptation step
     min_gap_minutes: float = 30.0
     cost_per_min: float = 0.0  # convert minutes → currency proxy if needed
+    state_flush_interval: float = 0.0  # >0: coalesce state writes (seconds)
 
 
 # ─────────────────────────────────────────────
@@ -89,7 +132,7 @@ class AMRC:
         self.cfg = cfg
         try:
             if StateStore is not None:
-                self.state = StateStore(state_path)
+                self.state = StateStore(state_path, flush_interval=cfg.state_flush_interval)
             else:
                 print("[WARN] StateStore not available, AMRC will use fallback mode")
                 self.state = None
@@ -103,7 +146,7 @@ class AMRC:
             return 0.0
         minutes = (time.time() - last_ts) / 60.0
         f = max(0.0, (self.cfg.min_gap_minutes - minutes)) / self.cfg.min_gap_minutes
-        return float(np.clip(f, 0.0, 1.0)) if np is not None else float(max(0.0, min(f, 1.0)))
+        return float(_clip(f, 0.0, 1.0))
 
     # ─────────────────────────────────────────────
     def decide(
@@ -116,66 +159,100 @@ class AMRC:
             return self._fallback_decision()
 
         try:
-            st = self.state.get()
-            w = np.array(st["w"], dtype=float) if np is not None else st["w"]
-            theta = float(st["theta"])
-            last_ts = float(st["last_retrain_ts"])
-
-            # ----- signals -----
-            ref_stats = load_reference_stats(ref_stats_path) if os.path.exists(ref_stats_path) else {"columns": {}}
-            new_cols = load_csv_numeric_columns(new_csv_path) if os.path.exists(new_csv_path) else {}
-
-            s1_raw = drift_wasserstein(ref_stats, new_cols)      # 0..~10
-            s1 = float(np.clip(s1_raw / 5.0, 0.0, 1.0)) if np is not None else float(max(0.0, min(s1_raw / 5.0, 1.0)))
+            new_cols = _load_csv_numeric_columns_cached(new_csv_path) if os.path.exists(new_csv_path) else {}
 
-            # entropy
-            s2 = 0.0
-            if probs_csv_path and os.path.exists(probs_csv_path):
+            probs = None
+            if probs_csv_path and os.path.exists(probs_csv_path) and np is not None:
                 try:
-                    if np is not None:
-                        probs = np.genfromtxt(probs_csv_path, delimiter=",")
-                        if probs.ndim == 1:
-                            probs = probs.reshape(-1, 2)
-                        s2 = entropy_from_probs(probs)
+                    probs = np.loadtxt(probs_csv_path, delimiter=",", dtype=np.float32)  # C parser, no type inference
+                    if probs.ndim == 1:
+                        probs = probs.reshape(-1, 2)
                 except Exception:
-                    s2 = 0.0
-
-            # cost
-            mb = file_size_mb(new_csv_path)
-            cost_min = estimate_cost_minutes(mb)
-            s3 = cost_min if self.cfg.cost_per_min <= 0 else cost_min * self.cfg.cost_per_min
-            s3 = float(np.clip(s3 / 30.0, 0.0, 1.0)) if np is not None else float(max(0.0, min(s3 / 30.0, 1.0)))
-
-            # fatigue
-            s4 = self._fatigue(last_ts)
-
-            # decision
-            if np is not None:
-                signals = np.array([
-                    self.cfg.alpha * s1,
-                    self.cfg.beta * s2,
-                    -self.cfg.gamma * s3,
-                    -self.cfg.delta * s4
-                ], dtype=float)
-                R = float(np.dot(w, signals))
-            else:
-                sig = [self.cfg.alpha * s1, self.cfg.beta * s2, -self.cfg.gamma * s3, -self.cfg.delta * s4]
-                R = float(sum(w[i] * sig[i] for i in range(len(w))))
-
-            retrain = R > theta
-
-            return {
-                "signals": {"drift": s1, "entropy": s2, "cost": s3, "fatigue": s4},
-                "raw": {"drift_wasserstein": s1_raw, "data_mb": mb, "cost_min": cost_min},
-                "weights": {"w1": float(w[0]), "w2": float(w[1]), "w3": float(w[2]), "w4": float(w[3])},
-                "theta": theta,
-                "score": R,
-                "retrain": bool(retrain)
-            }
+                    probs = None
+
+            return self._decide(self._ref_stats(ref_stats_path), new_cols, file_size_mb(new_csv_path), probs)
+        except Exception as e:
+            print(f"[ERROR] AMRC decision failed: {e}")
+            return self._fallback_decision()
+
+    def decide_arrays(self, ref_stats: Union[str, Dict], new_cols: Dict, probs=None) -> Dict:
+        """decide() for a batch already in memory: new_cols maps column → 1-D array (no CSV round-trip).
+        ref_stats is a stats JSON path or the already-parsed dict; data_mb is the in-memory size of the columns."""
+        if self.state is None or np is None:
+            return self._fallback_decision()
+
+        try:
+            cols = {}
+            for name, col in new_cols.items():
+                col = np.asarray(col, dtype=float)
+                col = col[np.isfinite(col)]
+                if col.size:
+                    cols[name] = col
+            mb = sum(c.nbytes for c in cols.values()) / (1024 * 1024)
+            return self._decide(self._ref_stats(ref_stats), cols, mb, probs)
+        except Exception as e:
+            print(f"[ERROR] AMRC decision failed: {e}")
+            return self._fallback_decision()
+
+    def decide_npy(self, ref_stats: Union[str, Dict], npy_path: str) -> Dict:
+        """decide() for a batch saved as a structured .npy (memory-mapped instead of CSV-parsed)."""
+        if self.state is None:
+            return self._fallback_decision()
+
+        try:
+            new_cols = _load_npy_numeric_columns_cached(npy_path) if os.path.exists(npy_path) else {}
+            return self._decide(self._ref_stats(ref_stats), new_cols, file_size_mb(npy_path))
         except Exception as e:
             print(f"[ERROR] AMRC decision failed: {e}")
             return self._fallback_decision()
 
+    @staticmethod
+    def _ref_stats(ref_stats: Union[str, Dict]) -> Dict:
+        """Parsed reference stats: dicts pass through (no per-call stat/JSON load), paths go via the cache."""
+        if isinstance(ref_stats, dict):
+            return ref_stats
+        return _load_reference_stats_cached(ref_stats) if os.path.exists(ref_stats) else {"columns": {}}
+
+    def _decide(self, ref_stats: Dict, new_cols: Dict, mb: float, probs=None) -> Dict:
+        st = self.state.get()
+        w = [float(v) for v in st["w"]]
+        theta = float(st["theta"])
+        last_ts = float(st["last_retrain_ts"])
+
+        # ----- signals -----
+        s1_raw = drift_wasserstein(ref_stats, new_cols)      # 0..~10
+        s1 = float(_clip(s1_raw / 5.0, 0.0, 1.0))
+
+        # entropy
+        s2 = entropy_from_probs(probs) if probs is not None else 0.0
+
+        # cost
+        cost_min = estimate_cost_minutes(mb)
+        s3 = cost_min if self.cfg.cost_per_min <= 0 else cost_min * self.cfg.cost_per_min
+        s3 = float(_clip(s3 / 30.0, 0.0, 1.0))
+
+        # fatigue
+        s4 = self._fatigue(last_ts)
+
+        # decision
+        R = float(
+            w[0] * self.cfg.alpha * s1
+            + w[1] * self.cfg.beta * s2
+            - w[2] * self.cfg.gamma * s3
+            - w[3] * self.cfg.delta * s4
+        )
+
+        retrain = R > theta
+
+        return {
+            "signals": {"drift": s1, "entropy": s2, "cost": s3, "fatigue": s4},
+            "raw": {"drift_wasserstein": s1_raw, "data_mb": mb, "cost_min": cost_min},
+            "weights": {"w1": float(w[0]), "w2": float(w[1]), "w3": float(w[2]), "w4": float(w[3])},
+            "theta": theta,
+            "score": R,
+            "retrain": bool(retrain)
+        }
+
     # ─────────────────────────────────────────────
     def _fallback_decision(self) -> Dict:
         """Fallback decision when dependencies are missing"""
@@ -195,23 +272,25 @@ class AMRC:
             print("[WARN] Cannot adapt - state store not available")
             return
 
-        try:
-            st = self.state.get()
-            w = np.array(st["w"], dtype=float) if np is not None else st["w"]
+        def step(st: Dict) -> Dict:
+            lr = self.cfg.lr
+            err = _clip(float(outcome_error), 0.0, 1.0)
+            cst = _clip(outcome_cost_minutes / 30.0, 0.0, 1.0)
+            w = [float(v) for v in st["w"]]
+
+            # push sensitivity to error and cost
+            w = [
+                _clip(w[0] + lr * err, 0.0, 2.0),  # drift
+                _clip(w[1] + lr * err, 0.0, 2.0),  # entropy
+                _clip(w[2] + lr * cst, 0.0, 2.0),  # cost
+                _clip(w[3] + lr * cst, 0.0, 2.0),  # fatigue
+            ]
+            # keep firing rate reasonable by nudging theta against combined pressure
+            theta = _clip(float(st["theta"]) + lr * (0.5 - 0.5 * err - 0.5 * cst), 0.1, 1.5)
+            return {"w": w, "theta": theta}
 
-            err = float(np.clip(outcome_error, 0.0, 1.0)) if np is not None else float(max(0.0, min(outcome_error, 1.0)))
-            cst = float(np.clip(outcome_cost_minutes / 30.0, 0.0, 1.0)) if np is not None else float(max(0.0, min(outcome_cost_minutes / 30.0, 1.0)))
-
-            # adjust weights
-            w[0] = float(np.clip(w[0] + self.cfg.lr * err, 0.0, 2.0))  # drift
-            w[1] = float(np.clip(w[1] + self.cfg.lr * err, 0.0, 2.0))  # entropy
-            w[2] = float(np.clip(w[2] + self.cfg.lr * cst, 0.0, 2.0))  # cost
-            w[3] = float(np.clip(w[3] + self.cfg.lr * cst, 0.0, 2.0))  # fatigue
-
-            theta = float(st["theta"])
-            theta = float(np.clip(theta + self.cfg.lr * (0.5 - 0.5 * err - 0.5 * cst), 0.1, 1.5)) if np is not None else float(max(0.1, min(theta + self.cfg.lr * (0.5 - 0.5 * err - 0.5 * cst), 1.5)))
-
-            self.state.update(w=list(map(float, w)), theta=theta)
+        try:
+            self.state.modify(step)  # single locked read + write
         except Exception as e:
             print(f"[ERROR] AMRC adaptation failed: {e}")
 
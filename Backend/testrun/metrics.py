@@ -41,6 +41,39 @@ def save_reference_stats(path: str, stats: Dict) -> None:
     with open(path, "w", encoding="utf-8") as f:
         json.dump(stats, f, indent=2)
 
+def _column_stats(arr, max_rows: int) -> Dict:
+    """Per-column mean/std/quantiles for a structured array (named numeric fields)."""
+    stats = {}
+    for name in arr.dtype.names:
+        try:
+            col = np.asarray(arr[name], dtype=float)
+            col = col[np.isfinite(col)]
+            if col.size == 0:
+                continue
+            n = min(col.size, max_rows)
+            c = col[:n]
+            stats[name] = {
+                "mean": float(np.mean(c)),
+                "std": float(np.std(c) + 1e-12),
+                "q": list(np.quantile(c, [0.05, 0.25, 0.5, 0.75, 0.95]))
+            }
+        except Exception:
+            continue
+    return stats
+
+def _numeric_columns(arr) -> Dict:
+    """Finite float columns of a structured array, keyed by field name."""
+    out = {}
+    for name in arr.dtype.names:
+        try:
+            col = np.asarray(arr[name], dtype=float)
+            col = col[np.isfinite(col)]
+            if col.size:
+                out[name] = col
+        except Exception:
+            continue
+    return out
+
 def compute_reference_stats_from_csv(csv_path: str, max_rows: int = 200_000) -> Dict:
     """Build simple numeric reference: per-column mean/std and quantiles."""
     if np is None:
@@ -49,23 +82,20 @@ def compute_reference_stats_from_csv(csv_path: str, max_rows: int = 200_000) ->
     
     try:
         arr = np.genfromtxt(csv_path, delimiter=",", names=True, dtype=None, encoding=None)
-        stats = {}
-        for name in arr.dtype.names:
-            try:
-                col = np.asarray(arr[name], dtype=float)
-                col = col[np.isfinite(col)]
-                if col.size == 0:
-                    continue
-                n = min(col.size, max_rows)
-                c = col[:n]
-                stats[name] = {
-                    "mean": float(np.mean(c)),
-                    "std": float(np.std(c) + 1e-12),
-                    "q": list(np.quantile(c, [0.05, 0.25, 0.5, 0.75, 0.95]))
-                }
-            except Exception:
-                continue
-        return {"created_ts": time.time(), "columns": stats}
+        return {"created_ts": time.time(), "columns": _column_stats(arr, max_rows)}
+    except Exception as e:
+        print(f"[WARN] Failed to compute reference stats: {e}")
+        return {"created_ts": time.time(), "columns": {}}
+
+def compute_reference_stats_from_npy(npy_path: str, max_rows: int = 200_000) -> Dict:
+    """Same as the CSV version for a structured .npy (memory-mapped, no text parsing)."""
+    if np is None:
+        print("[WARN] numpy not available, returning empty stats")
+        return {"created_ts": time.time(), "columns": {}}
+
+    try:
+        arr = np.load(npy_path, mmap_mode="r")
+        return {"created_ts": time.time(), "columns": _column_stats(arr, max_rows)}
     except Exception as e:
         print(f"[WARN] Failed to compute reference stats: {e}")
         return {"created_ts": time.time(), "columns": {}}
@@ -78,20 +108,31 @@ def load_csv_numeric_columns(csv_path: str) -> Dict:
     
     try:
         arr = np.genfromtxt(csv_path, delimiter=",", names=True, dtype=None, encoding=None)
-        out = {}
-        for name in arr.dtype.names:
-            try:
-                col = np.asarray(arr[name], dtype=float)
-                col = col[np.isfinite(col)]
-                if col.size:
-                    out[name] = col
-            except Exception:
-                continue
-        return out
+        return _numeric_columns(arr)
     except Exception as e:
         print(f"[WARN] Failed to load CSV columns: {e}")
         return {}
 
+def load_npy_numeric_columns(npy_path: str) -> Dict:
+    """Load numeric columns from a structured .npy via mmap (pages read on demand)."""
+    if np is None:
+        print("[WARN] numpy not available, returning empty columns")
+        return {}
+
+    try:
+        return _numeric_columns(np.load(npy_path, mmap_mode="r"))
+    except Exception as e:
+        print(f"[WARN] Failed to load .npy columns: {e}")
+        return {}
+
+def save_columns_npy(path: str, cols: Dict) -> None:
+    """Write equal-length numeric columns as one structured float32 .npy."""
+    names = list(cols)
+    arr = np.empty(len(cols[names[0]]), dtype=[(n, np.float32) for n in names])
+    for n in names:
+        arr[n] = cols[n]
+    np.save(path, arr)
+
 # ---------- Metrics ----------
 
 def drift_wasserstein(ref_stats: Dict, new_cols: Dict) -> float:
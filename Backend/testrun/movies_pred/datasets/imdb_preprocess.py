@@ -1,44 +1,79 @@
+import numpy as np
 import pandas as pd
 import re
 import os
+from collections import Counter
 
 RAW_PATH = "IMDB Dataset.csv"        # Original Kaggle file
 OUT_PATH = "dataset.csv"             # Cleaned output for MeshOps
+CHUNK_ROWS = 8192                    # rows per streamed read
 
-def clean_text(text: str) -> str:
-    """Remove HTML tags, punctuation noise, and normalize spaces."""
-    if not isinstance(text, str):
-        return ""
-    text = re.sub(r"<br\s*/?>", " ", text)           # remove <br> and <br />
-    text = re.sub(r"[^A-Za-z0-9.,!? ]+", " ", text)  # keep basic punctuation
-    text = re.sub(r"\s+", " ", text).strip()         # collapse spaces
-    return text
+BR = re.compile(r"<br\s*/?>")                # <br> and <br />
+NOISE = re.compile(r"[^A-Za-z0-9.,!? ]+")    # keep basic punctuation
+WS = re.compile(r"\s+")                      # collapse spaces
+
+def clean_reviews(s: pd.Series) -> pd.Series:
+    """Remove HTML tags, punctuation noise, and normalize spaces (whole column at once)."""
+    s = s.where(s.map(type).eq(str), "")     # non-strings → ""
+    return (s.str.replace(BR, " ", regex=True)
+             .str.replace(NOISE, " ", regex=True)
+             .str.replace(WS, " ", regex=True)
+             .str.strip())
+
+def read_chunks():
+    """Stream (review, sentiment) rows with null rows dropped and sentiment normalized."""
+    for df in pd.read_csv(RAW_PATH, usecols=["review", "sentiment"],
+                          dtype={"review": "string", "sentiment": "category"},
+                          engine="c", chunksize=CHUNK_ROWS):
+        df = df.dropna(subset=["review", "sentiment"])
+        df["sentiment"] = df["sentiment"].str.lower().str.strip()
+        yield df
 
 def main():
     if not os.path.exists(RAW_PATH):
         raise FileNotFoundError(f"Raw file not found: {RAW_PATH}")
 
-    print(f"[INFO] Loading {RAW_PATH} ...")
-    df = pd.read_csv(RAW_PATH)
+    # Pass 1: class counts only (balance target = rarest class)
+    print(f"[INFO] Counting {RAW_PATH} ...")
+    counts = Counter()
+    for df in read_chunks():
+        counts.update(df["sentiment"].value_counts().to_dict())
+    min_count = min(counts.values())
 
-    # Basic cleaning
-    df = df.dropna(subset=["review", "sentiment"])
-    df["review"] = df["review"].apply(clean_text)
-    df["sentiment"] = df["sentiment"].str.lower().str.strip()
+    # Pass 2: clean each chunk and keep a uniform sample per class (Algorithm R);
+    # peak memory is one chunk + the balanced output, not the whole raw file
+    print(f"[INFO] Cleaning + sampling {min_count:,} rows per class ...")
+    rng = np.random.default_rng(42)
+    reservoirs = {label: np.empty(min_count, dtype=object) for label in counts}
+    seen = dict.fromkeys(counts, 0)
+    for df in read_chunks():
+        reviews = clean_reviews(df["review"]).to_numpy(dtype=object)
+        for label, pos in df.groupby("sentiment").indices.items():
+            items = reviews[pos]
+            t = seen[label] + np.arange(len(items))            # stream index of each item
+            seen[label] += len(items)
+            res = reservoirs[label]
+            fill = t < min_count
+            res[t[fill]] = items[fill]
+            j = rng.integers(0, t[~fill] + 1)                  # replace slot j with prob k/(t+1)
+            hit = j < min_count
+            slots, src = j[hit], items[~fill][hit]
+            # keep only the last item per slot (as the sequential loop would); fancy-index
+            # assignment does not define which of several writes to one index wins
+            slots, last = np.unique(slots[::-1], return_index=True)
+            res[slots] = src[::-1][last]
 
-    # Balance positive/negative reviews (optional, keeps same total)
-    min_count = df["sentiment"].value_counts().min()
-    balanced = (
-        df.groupby("sentiment", group_keys=False)
-          .apply(lambda x: x.sample(min_count, random_state=42))
-          .reset_index(drop=True)
-    )
+    labels = sorted(reservoirs)
+    balanced = pd.DataFrame({
+        "review": np.concatenate([reservoirs[l] for l in labels]),
+        "sentiment": np.repeat(labels, min_count),
+    })
 
     print(f"[INFO] Final dataset size: {len(balanced):,} rows")
     print(balanced["sentiment"].value_counts())
 
     # Save cleaned dataset
-    balanced.to_csv(OUT_PATH, index=False, encoding="utf-8")
+    balanced.to_csv(OUT_PATH, index=False, encoding="utf-8", chunksize=50_000)
     print(f"[SUCCESS] Cleaned dataset saved → {OUT_PATH}")
 
 if __name__ == "__main__":
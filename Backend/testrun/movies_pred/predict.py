@@ -2,7 +2,7 @@ import pandas as pd
 import joblib
 
 # --- Load model ---
-model = joblib.load("imdb_model.pkl")
+model = joblib.load("imdb_model.pkl", mmap_mode="r")  # coef_/idf_ arrays paged in on demand
 
 # --- Example test reviews ---
 test_data = pd.DataFrame({
@@ -1,21 +1,23 @@
 # simulate_amrc.py
-import os, csv, time
+import os, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
 
 from amrc import AMRC, AMRCConfig
-from metrics import compute_reference_stats_from_csv, save_reference_stats
+from metrics import compute_reference_stats_from_npy, save_columns_npy, save_reference_stats
 from state_store import StateStore
 
 # ----------------------------------------------------------
 # 0) Global config
 # ----------------------------------------------------------
 os.makedirs("sim_data", exist_ok=True)
-ref_csv = "sim_data/ref.csv"
+ref_npy = "sim_data/ref.npy"
 ref_stats_json = "sim_data/ref_stats.json"
 state_path = "sim_data/amrc_state.json"
 
-np.random.seed(42)
+np.random.seed(42)                 # metrics.drift_wasserstein samples from the global RNG
+rng = np.random.default_rng(42)    # batch generation (PCG64, block draws)
 
 N = 5000             # samples per batch
 ROUNDS = 5000        # number of total rounds
@@ -23,93 +25,107 @@ WINDOW = 100         # rolling window
 DRIFT_CYCLE = 200    # drift period
 THETA = 0.22         # tuned decision threshold for recall ≈ 0.61
 ADAPTIVE = False     # freeze controller during evaluation
+RNG_BLOCK = 100      # rounds of samples drawn per RNG call (~4 MB float32)
+PERSIST_BATCHES = os.environ.get("PERSIST_BATCHES") == "1"  # write batch_<r>.npy for debugging only
+WRITE_WORKERS = 4    # background threads persisting batch files
+MAX_PENDING_WRITES = 32  # bound on queued writes (caps memory held by in-flight batches)
+NO_PLOT = os.environ.get("NO_PLOT") == "1"        # batch sweeps: skip visualization (and matplotlib) entirely
+SHOW_PLOTS = os.environ.get("SHOW_PLOTS") == "1"  # open GUI windows; otherwise render PNGs headless
 
 # ----------------------------------------------------------
 # Helper functions
 # ----------------------------------------------------------
-def drift_mu(round_id: int) -> float:
-    """Cyclic drift pattern: no→mild→medium→strong."""
-    phase = (round_id // DRIFT_CYCLE) % 4
-    return [0.0, 0.5, 1.0, 2.0][phase]
-
-
-def write_batch_csv(round_id: int, mu_shift: float) -> str:
-    """Generate synthetic batch with given drift shift."""
-    xb = np.random.normal(mu_shift, 1, N)
-    yb = np.random.normal(5 + mu_shift, 2, N)
-    path = f"sim_data/batch_{round_id}.csv"
-    with open(path, "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["x", "y"])
-        w.writerows(zip(xb, yb))
+def drift_mus(rounds: int):
+    """Cyclic drift pattern for rounds 1..rounds: no→mild→medium→strong, DRIFT_CYCLE rounds each."""
+    levels = np.array([0.0, 0.5, 1.0, 2.0], dtype=np.float32)
+    return levels[(np.arange(1, rounds + 1) // DRIFT_CYCLE) % levels.size]
+
+
+def gen_batches(mus):
+    """Yield synthetic (x, y) per round 1..ROUNDS shifted by mus[r-1].
+    Normals are drawn RNG_BLOCK rounds at a time as one float32 buffer, then shifted/scaled."""
+    for start in range(0, ROUNDS, RNG_BLOCK):
+        mu = mus[start:start + RNG_BLOCK, None]
+        z = rng.standard_normal((len(mu), 2, N), dtype=np.float32)
+        yield from zip(z[:, 0] + mu, z[:, 1] * 2 + 5 + mu)
+
+
+def write_batch_npy(round_id: int, xb, yb) -> str:
+    """Persist a batch for inspection as binary float32 (reload with AMRC.decide_npy)."""
+    path = f"sim_data/batch_{round_id}.npy"
+    save_columns_npy(path, {"x": xb, "y": yb})
     return path
 
 
 # ----------------------------------------------------------
 # 1) Reference dataset (baseline distribution)
 # ----------------------------------------------------------
-x = np.random.normal(0, 1, N)
-y = np.random.normal(5, 2, N)
-with open(ref_csv, "w", newline="") as f:
-    w = csv.writer(f)
-    w.writerow(["x", "y"])
-    w.writerows(zip(x, y))
-save_reference_stats(ref_stats_json, compute_reference_stats_from_csv(ref_csv))
+z = rng.standard_normal((2, N), dtype=np.float32)
+x, y = z[0], z[1] * 2 + 5
+save_columns_npy(ref_npy, {"x": x, "y": y})
+ref_stats = compute_reference_stats_from_npy(ref_npy)  # parsed once, reused every round
+save_reference_stats(ref_stats_json, ref_stats)
 
 
 # ----------------------------------------------------------
 # 2) AMRC initialization
 # ----------------------------------------------------------
-cfg = AMRCConfig(alpha=2.0, beta=1.0, gamma=0.5, delta=0.5, lr=0.03)
+cfg = AMRCConfig(alpha=2.0, beta=1.0, gamma=0.5, delta=0.5, lr=0.03, state_flush_interval=1.0)
 amrc = AMRC(state_path, cfg)
 amrc.state.update(w=[0.8, 0.25, 0.3, 0.15], theta=THETA, last_retrain_ts=0.0)
 
 # ----------------------------------------------------------
 # 3) Long-run 5000-round simulation (frozen AMRC)
 # ----------------------------------------------------------
-true_labels, decisions, scores, acc_history = [], [], [], []
+# Injected drift and independent ground truth for every round, computed up front
+MU_GT_THRESHOLD = 0.5  # mild+ drifts count as true drift
+mus = drift_mus(ROUNDS)
+true_arr = (mus >= MU_GT_THRESHOLD).astype(np.int8)
+
+# Preallocated per-round buffers (contiguous, typed) instead of growing lists
+dec_arr = np.empty(ROUNDS, dtype=np.int8)
+scores_arr = np.empty(ROUNDS, dtype=np.float32)
+writer = ThreadPoolExecutor(max_workers=WRITE_WORKERS) if PERSIST_BATCHES else None
+pending = deque()
 start_time = time.time()
 
 print(f"\n=== Running fixed-threshold evaluation for {ROUNDS} rounds (θ={THETA}) ===")
 
-for r in range(1, ROUNDS + 1):
-    mu = drift_mu(r)
-    csv_path = write_batch_csv(r, mu)
+for r, (xb, yb) in enumerate(gen_batches(mus), start=1):
+    if writer is not None:
+        # persist off the hot path; np.save releases the GIL during file I/O
+        pending.append(writer.submit(write_batch_npy, r, xb, yb))
+        if len(pending) > MAX_PENDING_WRITES:
+            pending.popleft().result()
 
-    dec = amrc.decide(ref_stats_json, csv_path)
+    dec = amrc.decide_arrays(ref_stats, {"x": xb, "y": yb})  # no CSV re-parse, no stats reload
     drift = dec["signals"]["drift"]
+    gt = bool(true_arr[r - 1])
 
-    # Independent ground-truth: use injected drift (mu)
-    MU_GT_THRESHOLD = 0.5  # mild+ drifts count as true drift
-    gt = mu >= MU_GT_THRESHOLD
-
-    true_labels.append(gt)
-    decisions.append(dec["retrain"])
-    scores.append(dec["score"])
+    dec_arr[r - 1] = dec["retrain"]
+    scores_arr[r - 1] = dec["score"]
 
     if ADAPTIVE:
         amrc.adapt(1.0 if gt else 0.0, dec["raw"]["cost_min"])
         if dec["retrain"]:
             amrc.mark_retrained()
 
-    acc = np.mean(np.array(true_labels, int) == np.array(decisions, int))
-    acc_history.append(acc)
-
     if r % 500 == 0:
         print(f"Round {r:04d}/{ROUNDS} | Drift={drift:.3f} | "
               f"Score={dec['score']:.3f} | Retrain? {dec['retrain']} | GT={gt}")
 
+for fut in pending:
+    fut.result()
+if writer is not None:
+    writer.shutdown()
 runtime = time.time() - start_time
 
 # ----------------------------------------------------------
 # 4) Final metrics
 # ----------------------------------------------------------
-true_arr = np.array(true_labels, int)
-dec_arr = np.array(decisions, int)
-TP = np.sum((dec_arr == 1) & (true_arr == 1))
-FP = np.sum((dec_arr == 1) & (true_arr == 0))
-FN = np.sum((dec_arr == 0) & (true_arr == 1))
-TN = np.sum((dec_arr == 0) & (true_arr == 0))
+# 2-bit code per round (decision<<1 | truth) → one bincount gives TN, FN, FP, TP
+code = (dec_arr.astype(np.int64) << 1) | true_arr.astype(np.int64)
+TN, FN, FP, TP = np.bincount(code, minlength=4)
 
 precision = TP / (TP + FP + 1e-9)
 recall    = TP / (TP + FN + 1e-9)
@@ -129,21 +145,31 @@ print(f"Runtime (s) : {runtime:.2f}")
 # ----------------------------------------------------------
 # 5) Visualization
 # ----------------------------------------------------------
-rolling_precision, rolling_recall, rolling_rounds = [], [], []
-for end in range(WINDOW, ROUNDS + 1, WINDOW):
-    s, e = end - WINDOW, end
-    sub_true, sub_dec = true_arr[s:e], dec_arr[s:e]
-    TPw = np.sum((sub_dec == 1) & (sub_true == 1))
-    FPw = np.sum((sub_dec == 1) & (sub_true == 0))
-    FNw = np.sum((sub_dec == 0) & (sub_true == 1))
-    rolling_precision.append(TPw / (TPw + FPw + 1e-9))
-    rolling_recall.append(TPw / (TPw + FNw + 1e-9))
-    rolling_rounds.append(end)
+if NO_PLOT:
+    raise SystemExit(0)
+
+import matplotlib
+if not SHOW_PLOTS:
+    matplotlib.use(os.environ.get("MPLBACKEND", "Agg"))  # no GUI backend import
+import matplotlib.pyplot as plt
+
+# All full windows at once: one-hot codes summed per window with a single reduceat
+n_full = (ROUNDS // WINDOW) * WINDOW
+onehot = np.eye(4, dtype=np.int32)[code[:n_full]]
+win_counts = np.add.reduceat(onehot, np.arange(0, n_full, WINDOW), axis=0)
+FNw, FPw, TPw = win_counts[:, 1], win_counts[:, 2], win_counts[:, 3]
+rolling_precision = TPw / (TPw + FPw + 1e-9)
+rolling_recall = TPw / (TPw + FNw + 1e-9)
+rolling_rounds = np.arange(WINDOW, n_full + 1, WINDOW)
+
+# Cumulative accuracy from the final arrays, sampled at the same window ends
+acc_full = np.cumsum(dec_arr == true_arr) / np.arange(1, ROUNDS + 1)
+acc_at_windows = acc_full[rolling_rounds - 1]
 
 plt.figure(figsize=(14,6))
-plt.plot(range(1, ROUNDS + 1), scores, label="AMRC Score (R)", color="blue")
+plt.plot(range(1, ROUNDS + 1), scores_arr, label="AMRC Score (R)", color="blue")
 plt.axhline(THETA, color="red", linestyle="--", label=f"θ={THETA:.2f}")
-plt.plot(range(1, ROUNDS + 1), acc_history, label="Cumulative Accuracy", color="orange")
+plt.plot(rolling_rounds, acc_at_windows, label="Cumulative Accuracy", color="orange")
 plt.xlabel("Round")
 plt.ylabel("Score / Accuracy")
 plt.title(f"AMRC Long-Run Simulation ({ROUNDS} rounds, θ={THETA:.2f})")
@@ -163,4 +189,5 @@ plt.grid(True, linestyle="--", alpha=0.5)
 plt.tight_layout()
 plt.savefig("sim_data/amrc_longrun_rolling_pr_rc.png", dpi=140)
 
-plt.show()
+if SHOW_PLOTS:
+    plt.show()